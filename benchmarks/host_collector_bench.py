@@ -0,0 +1,98 @@
+"""Benchmark reading hosts over one vs. several TR-064 sessions
+
+Simulates a Fritz!Box that answers every GetGenericHostEntry after a fixed
+latency and handles only a limited number of calls at the same time. Opening
+a session costs the download of the TR-064 description files; after the first
+download the sessions read them from the cache of fritzconnection.
+
+    python -m benchmarks.host_collector_bench [hosts] [latency_ms] [capacity] [open_ms] [cached_open_ms]
+"""
+
+import sys
+import threading
+import time
+from src.fritzbox import HostCollector, MAX_SESSIONS
+
+
+class SimulatedBox:
+    """TR-064 responder with per-call latency, limited capacity and session opening cost"""
+
+    def __init__(
+        self, hosts: int, latency: float, capacity: int, open_cost: float, cached_open_cost: float
+    ):
+        self.entries = [
+            {
+                "NewIPAddress": f"192.168.{i // 250}.{i % 250 + 1}",
+                "NewHostName": f"host{i}",
+                "NewMACAddress": f"00:00:00:00:{i // 256:02X}:{i % 256:02X}",
+                "NewActive": True,
+                "NewInterfaceType": "Ethernet",
+                "NewAddressSource": "DHCP",
+                "NewLeaseTimeRemaining": 0,
+            }
+            for i in range(hosts)
+        ]
+        self.latency = latency
+        self.capacity = threading.Semaphore(capacity)
+        self.open_cost = open_cost
+        self.cached_open_cost = cached_open_cost
+        self.cached = False
+
+    def session(self) -> "SimulatedSession":
+        # downloading the description files loads the box like other calls
+        with self.capacity:
+            time.sleep(self.cached_open_cost if self.cached else self.open_cost)
+        self.cached = True
+        return SimulatedSession(self)
+
+
+class SimulatedSession:
+    """one connection to the SimulatedBox"""
+
+    def __init__(self, box: SimulatedBox):
+        self.box = box
+
+    @property
+    def host_numbers(self) -> int:
+        return len(self.box.entries)
+
+    def get_generic_host_entry(self, index: int) -> dict:
+        with self.box.capacity:
+            time.sleep(self.box.latency)
+        if index >= len(self.box.entries):
+            raise IndexError
+        return self.box.entries[index]
+
+
+def measure(args: tuple, sessions: int) -> float:
+    box = SimulatedBox(*args)
+    # like FritzBox.__init__ the first session is open before reading
+    fh = box.session()
+    box.cached = False  # the first session doesn't fill the cache (use_cache=False)
+    start = time.perf_counter()
+    hosts = HostCollector(box.session, sessions).get_hosts_info(fh)
+    elapsed = time.perf_counter() - start
+    assert len(hosts) == len(box.entries)
+    return elapsed
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    capacity = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    open_cost = (float(sys.argv[4]) if len(sys.argv) > 4 else 1500) / 1000
+    cached_open_cost = (float(sys.argv[5]) if len(sys.argv) > 5 else 150) / 1000
+    args = (hosts, latency, capacity, open_cost, cached_open_cost)
+    print(
+        f"{hosts} hosts, {latency * 1000:.0f} ms per call, {capacity} parallel calls, "
+        f"{open_cost * 1000:.0f} ms ({cached_open_cost * 1000:.0f} ms cached) to open a session"
+    )
+    base = None
+    for sessions in [1, 2, 4, MAX_SESSIONS]:
+        elapsed = measure(args, sessions)
+        base = base or elapsed
+        print(f"{sessions:>2} sessions: {elapsed:6.2f} s  (x{base / elapsed:.1f})")
+
+
+if __name__ == "__main__":
+    main()
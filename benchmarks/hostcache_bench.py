@@ -0,0 +1,92 @@
+"""Benchmark the binary host cache against hosts.json
+
+Reads the hosts like main() does: all hosts from hosts.json followed by
+get_active_hosts and get_v4_hosts, against the needed columns of the v4
+hosts from hosts.cache.
+
+    python -m benchmarks.hostcache_bench [hosts]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from src.fritzbox import FritzBox
+from src.hostcache import HostCache
+from src.hostfilter import HostFilter
+
+REPEAT = 5
+
+
+def make_hosts(count: int) -> list[dict]:
+    hosts = []
+    for i in range(count):
+        v6 = i % 5 == 0
+        hosts.append(
+            {
+                "ip": f"fd00::{i:x}" if v6 else f"10.{i // 62500}.{i // 250 % 250}.{i % 250 + 1}",
+                "name": f"host-{i}.fritz.box",
+                "mac": f"00:00:00:{i // 65536:02X}:{i // 256 % 256:02X}:{i % 256:02X}",
+                "status": i % 3 != 0,
+                "interface_type": "802.11" if i % 2 else "Ethernet",
+                "address_source": "DHCP",
+                "lease_time_remaining": i * 7 % 864000,
+            }
+        )
+    return hosts
+
+
+def best(func) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    hosts = make_hosts(count)
+    ignore = HostFilter.from_string("[10.0.0.0/28]")
+    accept = HostFilter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "hosts.json")
+        cache = HostCache(os.path.join(tmp, "hosts.cache"))
+
+        def write_json():
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(hosts, f, ensure_ascii=False, indent=4)
+
+        def read_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            active = FritzBox.get_active_hosts(None, loaded, ignore, accept)
+            return FritzBox.get_v4_hosts(None, active)
+
+        def read_cache():
+            loaded = cache.load(
+                ["ip", "name", "mac", "status"],
+                {"ip": lambda ip: ip is not None and len(ip.split(".")) == 4},
+            )
+            active = FritzBox.get_active_hosts(None, loaded, ignore, accept)
+            return FritzBox.get_v4_hosts(None, active)
+
+        results = [
+            ("json   write", best(write_json)),
+            ("cache  write", best(lambda: cache.save(hosts))),
+            ("json   read + filter", best(read_json)),
+            ("cache  read + filter", best(read_cache)),
+            ("cache  read all", best(cache.load)),
+        ]
+        assert [x["ip"] for x in read_json()] == [x["ip"] for x in read_cache()]
+        print(f"{count} hosts, json {os.path.getsize(json_path)} bytes, "
+              f"cache {os.path.getsize(cache.path)} bytes")
+        for name, elapsed in results:
+            print(f"{name:<22} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
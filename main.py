@@ -2,11 +2,16 @@ import os
 from dotenv import load_dotenv
 from src.fritzbox import FritzBox
 from src.netbox import NetBox
+from src.hostfilter import HostFilter
+from src.lastseen import LastSeen, LAST_SEEN_FIELD, last_seen_interval
+from src.hostcache import HostCache, HostCacheError
 import json
 from pathlib import Path
 import logging
+from datetime import datetime, timezone
 
 HOSTS = "hosts.json"
+HOSTS_CACHE = "hosts.cache"
 IGNORE = "IGNORE"
 ACCEPT = "ACCEPT"
 LOGFILE = "LOGFILE"
@@ -21,19 +26,54 @@ def main():
     logging.basicConfig(filename=os.getenv(LOGFILE), level=logging.INFO)
 #    logger.info("Started")
 
-    ignore_list = os.getenv(IGNORE) if os.getenv(IGNORE) else []
-    accept_list = os.getenv(ACCEPT) if os.getenv(ACCEPT) else []
+    ignore_list = HostFilter.from_string(os.getenv(IGNORE))
+    accept_list = HostFilter.from_string(os.getenv(ACCEPT))
 
-    hosts = []
-    if Path(HOSTS).exists():
-        with open(HOSTS, "r", encoding="utf-8") as f:
-            hosts = json.load(f)
-    else:
+    hosts = None
+    observed = datetime.now(timezone.utc)
+    cache = HostCache(HOSTS_CACHE)
+    try:
+        # read only the needed columns of the v4 hosts
+        hosts = cache.load(
+            ["ip", "name", "mac", "status"],
+            {"ip": lambda ip: ip is not None and len(ip.split(".")) == 4},
+        )
+        observed = datetime.fromtimestamp(Path(HOSTS_CACHE).stat().st_mtime, timezone.utc)
+        if Path(HOSTS).exists() and Path(HOSTS).stat().st_mtime > Path(HOSTS_CACHE).stat().st_mtime:
+            logger.info(f"{HOSTS} is newer than {HOSTS_CACHE} but not read; delete {HOSTS_CACHE} to refresh")
+    except HostCacheError as e:
+        if Path(HOSTS_CACHE).exists():
+            logger.error(e)
+        elif Path(HOSTS).exists():
+            # upgrade: take over hosts.json of older versions once
+            try:
+                with open(HOSTS, "r", encoding="utf-8") as f:
+                    hosts = json.load(f)
+                observed = datetime.fromtimestamp(Path(HOSTS).stat().st_mtime, timezone.utc)
+                cache.save(hosts)
+            except json.JSONDecodeError as e:
+                logger.error(f"can't read {HOSTS}, reading Fritz!Box: {e}")
+                hosts = None
+    if (
+        hosts is not None
+        and os.getenv(LAST_SEEN_FIELD)
+        and datetime.now(timezone.utc) - observed >= last_seen_interval()
+    ):
+        # last seen needs observations newer than the interval
+        logger.info(f"{HOSTS_CACHE} is older than LAST_SEEN_INTERVAL, reading Fritz!Box")
+        hosts = None
+    if hosts is None:
+        observed = datetime.now(timezone.utc)
         fb = FritzBox()
         hosts = fb.get_hosts()
-        with open(HOSTS, "w", encoding="utf-8") as f:
-            json.dump(hosts, f, ensure_ascii=False, indent=4)
+        cache.save(hosts)
+        # readable copy for humans
+        cache.export_json(HOSTS)
 
+    # all v4 hosts (active and inactive) for last seen tracking
+    tracked_hosts = [
+        x for x in FritzBox.get_v4_hosts(None, hosts) if not ignore_list.matches(x)
+    ]
     # get only active hosts, which are not in ignore_list
     hosts = FritzBox.get_active_hosts(None, hosts, ignore_list, accept_list)
     hosts_v4 = FritzBox.get_v4_hosts(None, hosts)
@@ -46,33 +86,40 @@ def main():
     # get actually known IP-Adresses in Netbox
     nb = NetBox()
     try:
-        resp = nb.get_ip_adresses()
+        nb_hosts = nb.get_cached_ip_adresses()
     except IOError as e:
         logger.error(e)
         print(f"Error: {e}")
         exit(-1)
-    if resp.status_code != 200:  # not OK
+    if nb_hosts is None:  # not OK
         logger.info("Finished due to wrong return value")
         print("Finished due to wrong return value accessing netbox")
         exit(-1)  # exit with failure
 
-    nb_hosts = json.loads(resp.text)["results"]
     # print(json.dumps(nb_hosts, indent=4))
 
     # use only IP-V4 Adresses
     nb_v4_hosts = nb.get_v4_hosts(nb_hosts)
     # print(json.dumps(nb_v4_hosts, indent=4))
 
+    # record last seen and active state, only changes are written
+    if os.getenv(LAST_SEEN_FIELD):
+        last_seen = LastSeen(nb, nb_v4_hosts)
+        for host in tracked_hosts:
+            last_seen.record(host, observed)
+        last_seen.flush()
+
     print("\n------------------------------\n")
+    # lookups use the cached IP-Addresses of nb, kept up to date by own writes
     for host in hosts_v4:
-        found_in_nb = nb.search_hosts_with_dns_name(nb_v4_hosts, host["name"])
+        found_in_nb = nb.search_hosts_with_dns_name(None, host["name"])
         if len(found_in_nb) == 0:  # hostname doesn't exist in netbox
             # print(found_in_nb)
             # print(f"insert {host['ip']} {host['name']} in Netbox")
             resp = nb.create_ip_address(host["ip"], host["name"])
             if resp.status_code != 201:  # ip already exists
                 # get host with IP Address
-                found_in_nb = nb.search_hosts_with_ip_address(nb_v4_hosts, host["ip"])
+                found_in_nb = nb.search_hosts_with_ip_address(None, host["ip"])
                 if len(found_in_nb) > 0:
                     # change dns_name
                     resp = nb.modify_ip_address(
@@ -1,23 +1,56 @@
 import os
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 from fritzconnection.lib.fritzhosts import FritzHosts
+from src.hostfilter import HostFilter
+
+logger = logging.getLogger(__name__)
 
 fritzBoxIP = "FB_IP"
 fritzBoxUser = "USER"
 fritzBoxPWD = "PASSWORD"
+fritzBoxSessions = "SESSIONS"
+
+# the Fritz!Box answers TR-064 calls slowly, more sessions overload it
+MAX_SESSIONS = 8
 
 
 class FritzBox:
 
     def __init__(self):
-        self.fh = FritzHosts(
+        self.fh = self._new_session(use_cache=False)
+
+    def get_hosts(self):
+        try:
+            sessions = int(os.getenv(fritzBoxSessions, "1"))
+        except ValueError:
+            logger.warning(f"{fritzBoxSessions}={os.getenv(fritzBoxSessions)} is not a number, using 1")
+            sessions = 1
+        if sessions > 1:
+            collector = HostCollector(self._new_session, sessions)
+            return collector.get_hosts_info(self.fh)
+        return self.fh.get_hosts_info()
+
+    def _new_session(self, use_cache: bool = True) -> FritzHosts:
+        """open an independent connection to the Fritz!Box
+
+        Args:
+            use_cache (bool, optional): read the TR-064 description files from the cache of
+            fritzconnection instead of downloading them for every session. Defaults to True.
+
+        Returns:
+            FritzHosts: new connection
+        """
+        return FritzHosts(
             address=os.getenv(fritzBoxIP),
             user=os.getenv(fritzBoxUser),
             password=os.getenv(fritzBoxPWD),
+            use_cache=use_cache,
         )
 
-    def get_hosts(self):
-        return self.fh.get_hosts_info()
-
     def hostnames_has_duplicates(self, hosts: list[dict]) -> bool:
         """check whether all hostnames are bijective
 
@@ -32,13 +65,15 @@ class FritzBox:
         return hostnames.count(n) > 1
 
     def get_active_hosts(
-        self, hosts: list[dict], ignore_list: list = [], accept_list: list = []
+        self, hosts: list[dict], ignore_list: HostFilter | list = [], accept_list: HostFilter | list = []
     ) -> list[dict]:
         """get active hosts which are not in ignore_list
 
         Args:
             hosts (list[dict]): list of hosts coming from fritz!box
-            ignore_list (list, optional): list of ip addresses to be ignored.
+            ignore_list (HostFilter | list, optional): hosts to be ignored.
+            Defaults to [].
+            accept_list (HostFilter | list, optional): hosts to be added even if inactive.
             Defaults to [].
 
         Returns:
@@ -46,12 +81,14 @@ class FritzBox:
         """
         if len(hosts) == 0:
             return []
+        ignore = ignore_list if isinstance(ignore_list, HostFilter) else HostFilter(ignore_list)
+        accept = accept_list if isinstance(accept_list, HostFilter) else HostFilter(accept_list)
         return list(
             filter(
                 lambda x: (
-                    x["status"] and len(x["ip"]) > 0 and x["ip"] not in ignore_list
+                    x["status"] and len(x["ip"]) > 0 and not ignore.matches(x)
                 )
-                or x["ip"] in accept_list,
+                or accept.matches(x),
                 hosts,
             )
         )
@@ -79,3 +116,120 @@ class FritzBox:
             list: only v4 hosts
         """
         return list(filter(lambda x: len(x["ip"].split(".")) == 4, hosts))
+
+
+class HostCollector:
+    """read the generic host entries of the Fritz!Box over several sessions"""
+
+    def __init__(
+        self, new_session: Callable[[], FritzHosts], sessions: int = 4, retries: int = 2,
+        retry_delay: float = 0.5
+    ):
+        self.new_session = new_session
+        self.sessions: int = max(1, min(sessions, MAX_SESSIONS))
+        self.retries: int = retries
+        self.retry_delay: float = retry_delay
+
+    def get_hosts_info(self, fh: FritzHosts = None) -> list[dict]:
+        """get all hosts, same result as FritzHosts.get_hosts_info()
+
+        Args:
+            fh (FritzHosts, optional): already open connection, used as first session
+
+        Returns:
+            list[dict]: list of hosts in index order
+        """
+        fh = fh if fh is not None else self.new_session()
+        count = fh.host_numbers
+        sessions = min(self.sessions, count)
+        if sessions <= 1:
+            entries = self._collect(fh, range(count))
+        else:
+            # the first additional session fills the description cache, the others read it
+            first = [fh, self.new_session()]
+            # every session reads every n-th index
+            with ThreadPoolExecutor(max_workers=sessions) as executor:
+                futures = [
+                    executor.submit(
+                        self._collect,
+                        first[i] if i < len(first) else None,
+                        range(i, count, sessions),
+                    )
+                    for i in range(sessions)
+                ]
+                entries = {}
+                for future in futures:
+                    entries.update(future.result())
+        # merge in index order, up to the first index that is not known (any more)
+        hosts = []
+        while len(hosts) in entries:
+            hosts.append(entries[len(hosts)])
+        if len(hosts) == count:
+            # read hosts added while reading, like FritzHosts.get_hosts_info()
+            added = self._collect(fh, itertools.count(count))
+            hosts.extend(added[i] for i in sorted(added))
+        return hosts
+
+    def _collect(self, fh: FritzHosts, indexes) -> dict[int, dict]:
+        """read the host entries with indexes over one session
+
+        Args:
+            fh (FritzHosts): connection to use, None opens a new one
+            indexes (range | itertools.count): indexes to be read
+
+        Returns:
+            dict[int, dict]: hosts by index; stops at the first index not known (any more)
+        """
+        fh = fh if fh is not None else self.new_session()
+        hosts = {}
+        for index in indexes:
+            try:
+                entry, fh = self._get_entry(fh, index)
+            except IndexError:
+                # no more hosts
+                break
+            hosts[index] = host_info(entry)
+        return hosts
+
+    def _get_entry(self, fh: FritzHosts, index: int) -> tuple[dict, FritzHosts]:
+        """get generic host entry, retry it over a new session on failure
+
+        Args:
+            fh (FritzHosts): connection to use
+            index (int): index of the host
+
+        Returns:
+            tuple[dict, FritzHosts]: generic host entry and the connection to go on with
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return fh.get_generic_host_entry(index), fh
+            except IndexError:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.info(f"GetGenericHostEntry {index} failed ({e}), retrying")
+                # the connection is usually broken after a failure
+                time.sleep(self.retry_delay * (attempt + 1))
+                fh = self.new_session()
+
+
+def host_info(entry: dict) -> dict:
+    """convert generic host entry into the format of FritzHosts.get_hosts_info()
+
+    Args:
+        entry (dict): generic host entry
+
+    Returns:
+        dict: host
+    """
+    return {
+        "ip": entry["NewIPAddress"],
+        "name": entry["NewHostName"],
+        "mac": entry["NewMACAddress"],
+        "status": entry["NewActive"],
+        "interface_type": entry["NewInterfaceType"],
+        "address_source": entry["NewAddressSource"],
+        "lease_time_remaining": entry["NewLeaseTimeRemaining"],
+    }
@@ -0,0 +1,275 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Callable
+
+MAGIC = b"F2NB"
+VERSION = 1
+# magic, version, number of columns, number of hosts, length of column index
+HEADER = struct.Struct("<4sHHII")
+# type, length of name
+COLUMN = struct.Struct("<cH")
+# offset in data, length, crc32
+COLUMN_DATA = struct.Struct("<QQI")
+CRC = struct.Struct("<I")
+
+BOOL = b"b"
+INT = b"i"
+STR = b"s"
+JSON = b"j"
+NONE = 2  # value of None in bool columns
+INT_MIN = -(2 ** 63)
+INT_MAX = 2 ** 63 - 1
+
+
+class HostCacheError(IOError):
+    """cache file is missing, damaged or of another version"""
+
+
+class HostCache:
+    """columnar binary cache of the hosts coming from fritz!box
+
+    The file starts with a header and an index of the columns (name, type,
+    position, crc32), so a reader maps the file and decodes only the columns
+    it needs. Every column is checked against its crc32 when it is decoded.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+    def save(self, hosts: list[dict]) -> None:
+        """write hosts to cache file
+
+        Args:
+            hosts (list[dict]): list of hosts coming from fritz!box
+        """
+        names = []
+        for host in hosts:
+            names.extend(x for x in host if x not in names)
+        index = b""
+        blobs = []
+        offset = 0
+        for name in names:
+            kind, blob = _encode([host.get(name) for host in hosts])
+            encoded = name.encode("utf-8")
+            index += COLUMN.pack(kind, len(encoded)) + encoded
+            index += COLUMN_DATA.pack(offset, len(blob), zlib.crc32(blob))
+            blobs.append(blob)
+            offset += len(blob)
+        header = HEADER.pack(MAGIC, VERSION, len(names), len(hosts), len(index)) + index
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(CRC.pack(zlib.crc32(header)))
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, self.path)
+
+    def load(
+        self, columns: list[str] = None, where: dict[str, Callable] = {}
+    ) -> list[dict]:
+        """read hosts from cache file
+
+        Args:
+            columns (list[str], optional): keys of the hosts to be read. Defaults to all.
+            where (dict[str, Callable], optional): column -> predicate; only hosts
+            for which all predicates are true are decoded. Defaults to {}.
+
+        Raises:
+            HostCacheError: cache is missing, damaged or of another version
+
+        Returns:
+            list[dict]: list of hosts
+        """
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise HostCacheError(f"can't read {self.path}: {e}") from e
+        # errors of the predicates in where are not cache errors and pass through
+        with mm:
+            return self._load(mm, columns, where)
+
+    def _load(self, mm: mmap.mmap, columns: list[str], where: dict[str, Callable]) -> list[dict]:
+        """decode hosts from mapped cache file
+
+        Args:
+            mm (mmap.mmap): content of the cache file
+            columns (list[str]): keys of the hosts to be read, None for all
+            where (dict[str, Callable]): column -> predicate
+
+        Returns:
+            list[dict]: list of hosts
+        """
+        rows, index = _checked(_read_index, mm)
+        columns = list(index) if columns is None else [x for x in columns if x in index]
+        selected = range(rows)
+        values = {}
+        # decode the filter columns first, then only the selected rows of the others
+        for name, predicate in where.items():
+            if name not in index:
+                raise HostCacheError(f"column {name} not in {self.path}")
+            column = _checked(_decode, mm, index[name], rows, selected)
+            keep = [k for k, value in enumerate(column) if predicate(value)]
+            selected = [selected[k] for k in keep]
+            values = {x: [v[k] for k in keep] for x, v in values.items()}
+            values[name] = [column[k] for k in keep]
+        for name in columns:
+            if name not in values:
+                values[name] = _checked(_decode, mm, index[name], rows, selected)
+        if len(columns) == 0:
+            return [{} for _ in selected]
+        return [dict(zip(columns, row)) for row in zip(*(values[x] for x in columns))]
+
+    def export_json(self, path: str) -> None:
+        """write the cached hosts as json, readable for humans
+
+        Args:
+            path (str): path of the json file
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.load(), f, ensure_ascii=False, indent=4)
+
+
+def _checked(func: Callable, *args):
+    """call func to read the cache file, errors of the content become HostCacheError
+
+    Args:
+        func (Callable): _read_index or _decode
+        args: arguments of func
+
+    Raises:
+        HostCacheError: cache file can't be decoded
+
+    Returns:
+        result of func
+    """
+    try:
+        return func(*args)
+    except (ValueError, IndexError, struct.error) as e:
+        raise HostCacheError(f"can't decode host cache: {e}") from e
+
+
+def _read_index(mm: mmap.mmap) -> tuple[int, dict]:
+    """check header of cache file and read column index
+
+    Args:
+        mm (mmap.mmap): content of the cache file
+
+    Raises:
+        HostCacheError: wrong magic, version or checksum
+
+    Returns:
+        tuple[int, dict]: number of hosts, column name -> (type, offset, length, crc32)
+    """
+    if len(mm) < HEADER.size:
+        raise HostCacheError("cache file is truncated")
+    magic, version, ncols, rows, index_len = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise HostCacheError("no host cache file")
+    if version != VERSION:
+        raise HostCacheError(f"host cache version {version} is not supported")
+    end = HEADER.size + index_len
+    if len(mm) < end + CRC.size or CRC.unpack_from(mm, end)[0] != zlib.crc32(mm[:end]):
+        raise HostCacheError("header of cache file is damaged")
+    data = end + CRC.size
+    index = {}
+    pos = HEADER.size
+    for _ in range(ncols):
+        kind, length = COLUMN.unpack_from(mm, pos)
+        pos += COLUMN.size
+        name = mm[pos:pos + length].decode("utf-8")
+        pos += length
+        offset, size, crc = COLUMN_DATA.unpack_from(mm, pos)
+        pos += COLUMN_DATA.size
+        index[name] = (kind, data + offset, size, crc)
+    return rows, index
+
+
+def _encode(values: list) -> tuple[bytes, bytes]:
+    """encode values of one column
+
+    Args:
+        values (list): values of all hosts, None for missing
+
+    Returns:
+        tuple[bytes, bytes]: type and encoded column
+    """
+    present = [x for x in values if x is not None]
+    if all(isinstance(x, bool) for x in present):
+        return BOOL, bytes(NONE if x is None else int(x) for x in values)
+    valid = bytes(x is not None for x in values)
+    # bool mixed with int or numbers beyond int64 are stored as JSON
+    if all(type(x) is int and INT_MIN <= x <= INT_MAX for x in present):
+        numbers = array("q", (0 if x is None else x for x in values))
+        return INT, valid + _little_endian(numbers).tobytes()
+    kind = STR
+    if not all(isinstance(x, str) for x in present):
+        kind = JSON
+        values = [None if x is None else json.dumps(x, ensure_ascii=False) for x in values]
+    encoded = [b"" if x is None else x.encode("utf-8") for x in values]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    return kind, valid + _little_endian(offsets).tobytes() + b"".join(encoded)
+
+
+def _decode(mm: mmap.mmap, column: tuple, rows: int, selected) -> list:
+    """decode selected rows of one column
+
+    Args:
+        mm (mmap.mmap): content of the cache file
+        column (tuple): type, offset, length and crc32 of the column
+        rows (int): number of hosts
+        selected (range | list): rows to be decoded
+
+    Raises:
+        HostCacheError: column is damaged
+
+    Returns:
+        list: values of the selected rows
+    """
+    kind, offset, size, crc = column
+    # only this column is read from the mapped file
+    blob = mm[offset:offset + size]
+    if len(blob) != size or zlib.crc32(blob) != crc:
+        raise HostCacheError("column of cache file is damaged")
+    if kind == BOOL:
+        return [None if blob[i] == NONE else bool(blob[i]) for i in selected]
+    valid = blob[:rows]
+    if kind == INT:
+        numbers = _little_endian(array("q", blob[rows:rows + 8 * rows]))
+        return [numbers[i] if valid[i] else None for i in selected]
+    start = rows + 4 * (rows + 1)
+    offsets = _little_endian(array("I", blob[rows:start]))
+    strings = blob[start:]
+    if strings.isascii():
+        # byte offsets are character offsets, decode the column at once
+        strings = strings.decode("ascii")
+        values = [strings[offsets[i]:offsets[i + 1]] if valid[i] else None for i in selected]
+    else:
+        values = [
+            str(strings[offsets[i]:offsets[i + 1]], "utf-8") if valid[i] else None
+            for i in selected
+        ]
+    if kind == JSON:
+        values = [None if x is None else json.loads(x) for x in values]
+    return values
+
+
+def _little_endian(numbers: array) -> array:
+    """byte order of the cache file is little endian
+
+    Args:
+        numbers (array): array in native byte order (or read from file)
+
+    Returns:
+        array: same array, swapped on big endian machines
+    """
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return numbers
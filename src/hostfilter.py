@@ -0,0 +1,207 @@
+import re
+from bisect import bisect_right
+from fnmatch import translate
+from ipaddress import ip_address, ip_network
+
+# hostnames never contain ":", so everything else with ":" is a MAC address
+MAC_PATTERN = re.compile(r"[0-9A-Fa-f*?\[\]:]*:[0-9A-Fa-f*?\[\]:]*")
+# MAC address with "-": at least three groups of two hex digits, e.g. b8-27-eb-*
+DASHED_MAC_PATTERN = re.compile(r"[0-9A-Fa-f]{2}(-[0-9A-Fa-f]{2}){2,5}(-\*)?")
+GLOB_CHARS = re.compile(r"[*?\[]")
+# IPv4 address with glob pattern, e.g. 192.168.178.* or 192.168.178.1?
+IPV4_GLOB_PATTERN = re.compile(r"[0-9*?\[\]!-]+(\.[0-9*?\[\]!-]+){1,3}")
+
+
+class HostFilter:
+    """compiled list of IP addresses, CIDR networks, IP ranges, MAC addresses and hostnames
+
+    Entries of the list (separated by "," or whitespace, optionally enclosed in "[]"):
+        192.168.178.20             single IP address
+        192.168.178.0/28           network
+        192.168.178.100-192.168.178.120  range of IP addresses
+        192.168.178.*              IPv4 address with glob pattern
+        00:80:41:AE:FD:7E, 00:80:41:*, b8-27-eb-*  MAC address, optionally with glob pattern
+        printer, android-*         hostname, optionally with glob pattern
+    "mac:" and "name:" force the type of an entry.
+    """
+
+    def __init__(self, entries: list[str] = []):
+        self.ips: set = set()
+        self.macs: set = set()
+        self.names: set = set()
+        ip_globs = []
+        mac_globs = []
+        name_globs = []
+        # ip version -> list of (first, last) as integers
+        ranges: dict[int, list] = {4: [], 6: []}
+        for entry in entries:
+            entry = entry.strip()
+            if len(entry) == 0:
+                continue
+            kind, value = self._classify(entry)
+            if kind == "ip":
+                self.ips.add(value)
+            elif kind == "ip_glob":
+                ip_globs.append(translate(value))
+            elif kind == "range":
+                ranges[value[0].version].append((int(value[0]), int(value[1])))
+            elif kind == "mac":
+                value = value.upper().replace("-", ":")
+                if GLOB_CHARS.search(value):
+                    mac_globs.append(translate(value))
+                else:
+                    self.macs.add(value)
+            else:
+                value = value.casefold()
+                if GLOB_CHARS.search(value):
+                    name_globs.append(translate(value))
+                else:
+                    self.names.add(value)
+        # canonical strings of the addresses, so most hosts need no parsing
+        self.ip_strings: set = set(map(str, self.ips))
+        # IPv6 addresses are parsed to compare them in canonical form
+        self.has_ipv6: bool = any(x.version == 6 for x in self.ips)
+        self.ip_glob = re.compile("|".join(ip_globs)) if ip_globs else None
+        self.mac_glob = re.compile("|".join(mac_globs)) if mac_globs else None
+        self.name_glob = re.compile("|".join(name_globs)) if name_globs else None
+        # sorted, non overlapping intervals per ip version for bisect
+        self.starts: dict[int, list] = {}
+        self.ends: dict[int, list] = {}
+        for version, intervals in ranges.items():
+            merged = []
+            for first, last in sorted(intervals):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+            self.starts[version] = [x[0] for x in merged]
+            self.ends[version] = [x[1] for x in merged]
+        self.has_ranges: bool = any(self.starts.values())
+        self.has_macs: bool = len(self.macs) > 0 or self.mac_glob is not None
+        self.has_names: bool = len(self.names) > 0 or self.name_glob is not None
+
+    @classmethod
+    def from_string(cls, text: str) -> "HostFilter":
+        """compile filter from environment string like "[192.168.178.2, 10.0.0.0/8]"
+
+        Args:
+            text (str): list of entries, None or "" gives an empty filter
+
+        Returns:
+            HostFilter: compiled filter
+        """
+        if not text:
+            return cls()
+        return cls(re.split(r"[,\s]+", text.strip().strip("[]")))
+
+    def _classify(self, entry: str) -> tuple:
+        """get kind of entry
+
+        Args:
+            entry (str): one entry of the list
+
+        Returns:
+            tuple: ("ip", address), ("ip_glob", pattern), ("range", (first, last)), ("mac", mac)
+            or ("name", name)
+        """
+        if entry.startswith("mac:"):
+            return "mac", entry[4:]
+        if entry.startswith("name:"):
+            return "name", entry[5:]
+        try:
+            return "ip", ip_address(entry)
+        except ValueError:
+            pass
+        if "/" in entry:
+            try:
+                network = ip_network(entry, strict=False)
+                return "range", (network[0], network[-1])
+            except ValueError:
+                pass
+        if entry.count("-") == 1:
+            first, last = entry.split("-")
+            try:
+                first, last = ip_address(first), ip_address(last)
+                if first.version == last.version:
+                    return "range", (min(first, last), max(first, last))
+            except ValueError:
+                pass
+        if GLOB_CHARS.search(entry) and IPV4_GLOB_PATTERN.fullmatch(entry):
+            return "ip_glob", entry
+        if MAC_PATTERN.fullmatch(entry) or DASHED_MAC_PATTERN.fullmatch(entry):
+            return "mac", entry
+        return "name", entry
+
+    def match_ip(self, ip: str) -> bool:
+        """check whether ip is in the filter
+
+        Args:
+            ip (str): IP address
+
+        Returns:
+            bool: true if ip is one of the addresses or in one of the ranges
+        """
+        if not ip:
+            return False
+        if ip in self.ip_strings:
+            return True
+        if ":" not in ip:
+            # IPv4 addresses from fritz!box are canonical, parse only for ranges
+            if self.ip_glob is not None and self.ip_glob.match(ip) is not None:
+                return True
+            if not self.starts[4]:
+                return False
+        elif not self.starts[6] and not self.has_ipv6:
+            return False
+        try:
+            address = ip_address(ip)
+        except ValueError:
+            return False
+        if address in self.ips:
+            return True
+        starts = self.starts.get(address.version, [])
+        i = bisect_right(starts, int(address)) - 1
+        return i >= 0 and int(address) <= self.ends[address.version][i]
+
+    def match_mac(self, mac: str) -> bool:
+        """check whether mac is in the filter
+
+        Args:
+            mac (str): MAC address
+
+        Returns:
+            bool: true if mac matches
+        """
+        if not mac:
+            return False
+        mac = mac.upper()
+        return mac in self.macs or (self.mac_glob is not None and self.mac_glob.match(mac) is not None)
+
+    def match_name(self, name: str) -> bool:
+        """check whether hostname is in the filter
+
+        Args:
+            name (str): hostname
+
+        Returns:
+            bool: true if name matches (case insensitive)
+        """
+        if not name:
+            return False
+        name = name.casefold()
+        return name in self.names or (self.name_glob is not None and self.name_glob.match(name) is not None)
+
+    def matches(self, host: dict) -> bool:
+        """check whether host from fritz!box matches the filter
+
+        Args:
+            host (dict): host with "ip", "mac" and "name"
+
+        Returns:
+            bool: true if any of ip, mac or name matches
+        """
+        return (
+            self.match_ip(host.get("ip"))
+            or (self.has_macs and self.match_mac(host.get("mac")))
+            or (self.has_names and self.match_name(host.get("name")))
+        )
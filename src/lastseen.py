@@ -0,0 +1,143 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from src.netbox import NetBox
+
+logger = logging.getLogger(__name__)
+
+LAST_SEEN_FIELD = "LAST_SEEN_FIELD"
+ACTIVE_FIELD = "ACTIVE_FIELD"
+LAST_SEEN_INTERVAL = "LAST_SEEN_INTERVAL"
+
+
+def last_seen_interval() -> timedelta:
+    """interval after which last seen of an active host is written again
+
+    Returns:
+        timedelta: LAST_SEEN_INTERVAL, default one hour
+    """
+    return timedelta(seconds=int(os.getenv(LAST_SEEN_INTERVAL, "3600")))
+
+
+class LastSeen:
+    """record last seen time and active state of Fritz!Box hosts in Netbox custom fields
+
+    Updates are only queued if the active state changed or the stored last seen
+    time of an active host is older than the interval; they are sent as bulk PATCH.
+    """
+
+    def __init__(
+        self, nb: NetBox, nb_hosts: list[dict], interval: int = None, batch_size: int = 50
+    ):
+        self.nb: NetBox = nb
+        self.last_seen_field: str = os.getenv(LAST_SEEN_FIELD, "last_seen")
+        self.active_field: str = os.getenv(ACTIVE_FIELD, "fritzbox_active")
+        self.interval: timedelta = (
+            timedelta(seconds=interval) if interval is not None else last_seen_interval()
+        )
+        self.batch_size: int = batch_size
+        # ip -> Netbox hosts; the same address can exist several times (other prefix length or VRF)
+        self.nb_hosts: dict[str, list] = {}
+        for nb_host in nb_hosts:
+            self.nb_hosts.setdefault(nb_host["address"].split("/")[0], []).append(nb_host)
+        self.updates: list[dict] = []
+        # id -> queued update and IP Address in Netbox; Netbox hosts are changed after the write
+        self.pending: dict[int, tuple[dict, dict]] = {}
+
+    def record(self, host: dict, now: datetime = None) -> bool:
+        """queue update for host from fritz!box if necessary
+
+        Args:
+            host (dict): host coming from fritz!box
+            now (datetime, optional): time of the observation. Defaults to now.
+
+        Returns:
+            bool: true if an update was queued
+        """
+        now = now if now is not None else datetime.now(timezone.utc)
+        active = bool(host["status"])
+        queued = False
+        for nb_host in self.nb_hosts.get(host["ip"], []):
+            queued = self._record(nb_host, active, now) or queued
+        return queued
+
+    def _record(self, nb_host: dict, active: bool, now: datetime) -> bool:
+        """queue update for one IP Address in Netbox if necessary
+
+        Args:
+            nb_host (dict): IP Address in Netbox
+            active (bool): active state in fritz!box
+            now (datetime): time of the observation
+
+        Returns:
+            bool: true if an update was queued
+        """
+        queued = self.pending.get(nb_host["id"])
+        # state in Netbox including the update not written yet
+        fields = dict(nb_host.get("custom_fields") or {})
+        if queued is not None:
+            fields.update(queued[0]["custom_fields"])
+        last_seen = self._parse(fields.get(self.last_seen_field))
+        if last_seen is not None and now < last_seen:
+            # observation is older than the one stored in Netbox
+            return False
+        changed = fields.get(self.active_field) != active
+        stale = active and (last_seen is None or now - last_seen >= self.interval)
+        if not changed and not stale:
+            return False
+        update = {self.active_field: active}
+        if active:
+            update[self.last_seen_field] = now.isoformat(timespec="seconds")
+        if queued is not None:
+            queued[0]["custom_fields"].update(update)
+            return True
+        queued = ({"id": nb_host["id"], "custom_fields": update}, nb_host)
+        self.updates.append(queued[0])
+        self.pending[nb_host["id"]] = queued
+        return True
+
+    def flush(self) -> int:
+        """send queued updates to Netbox
+
+        Returns:
+            int: number of IP Addresses updated; failed updates stay queued and
+            only written updates change the Netbox hosts
+        """
+        updated = 0
+        failed = []
+        for start in range(0, len(self.updates), self.batch_size):
+            batch = self.updates[start:start + self.batch_size]
+            resp = self.nb.bulk_modify_ip_addresses(batch)
+            if resp.status_code != 200:
+                logger.error(f"could not update last seen of {len(batch)} IP Addresses: {resp.text}")
+                failed.extend(batch)
+            else:
+                updated += len(batch)
+                for update in batch:
+                    _, nb_host = self.pending.pop(update["id"])
+                    if not nb_host.get("custom_fields"):
+                        nb_host["custom_fields"] = {}
+                    nb_host["custom_fields"].update(update["custom_fields"])
+        if len(failed) > 0:
+            logger.error(f"{len(failed)} of {len(self.updates)} last seen updates not written")
+        self.updates = failed
+        return updated
+
+    def _parse(self, value: str) -> datetime:
+        """parse last seen value of Netbox
+
+        Args:
+            value (str): ISO time or None
+
+        Returns:
+            datetime: time with timezone or None
+        """
+        if not value:
+            return None
+        try:
+            last_seen = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        return last_seen
@@ -2,6 +2,7 @@ import requests
 import json
 import os
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +11,15 @@ PROTOCOL = "PROTOCOL"
 PORT = "PORT"
 NETBOX = "NETBOX"
 
+# webhook "model" names of the object types kept in the cached lists
+WEBHOOK_MODELS = {
+    "ipaddress": "ipam.ipaddress",
+    "macaddress": "dcim.macaddress",
+    "interface": "dcim.interface",
+}
+# fields of MAC Addresses returned with brief=1
+MAC_BRIEF_FIELDS = ["id", "url", "display", "mac_address", "description"]
+
 
 class NetBox:
 
@@ -21,6 +31,8 @@ class NetBox:
         self.ipAddrList: list = None
         self.cookies: list = None
         self.macList: list = None
+        # the cached lists are changed by webhooks in other threads, too
+        self.lock: threading.RLock = threading.RLock()
         self.client: requests.Session = requests.Session()
 
     def get_url_base(self) -> str:
@@ -111,6 +123,8 @@ class NetBox:
         )
         if resp.status_code != 201:
             logger.error(f"POST {url} returned {resp.status_code}")
+        else:
+            self.apply_ip_address_event("created", json.loads(resp.text))
         self.cookies = resp.cookies
         return resp
 
@@ -133,6 +147,8 @@ class NetBox:
         )
         if resp.status_code != 204:
             logger.error(f"DELETE {url} returned {resp.status_code}")
+        else:
+            self.apply_ip_address_event("deleted", {"id": int(id)})
         self.cookies = resp.cookies
         return resp
 
@@ -157,6 +173,29 @@ class NetBox:
         )
 
         #        resp = requests.request("PATCH", url, headers=headers, data=payload)
+        resp = self.client.patch(
+            url, headers=headers, data=payload, cookies=self.cookies
+        )
+        if resp.status_code != 200:
+            logger.error(f"PATCH {url} returned {resp.status_code}")
+        else:
+            self.apply_ip_address_event("updated", json.loads(resp.text))
+        self.cookies = resp.cookies
+        return resp
+
+    def bulk_modify_ip_addresses(self, updates: list[dict]) -> requests.Response:
+        """Modify several IP Addresses with one request
+
+        Args:
+            updates (list[dict]): fields to be set, every dict with "id" of the IP Address
+
+        Returns:
+            requests.Response: http-Response
+        """
+        url = self.get_url_base() + "/api/ipam/ip-addresses/"
+        headers = self.get_headers()
+        payload = json.dumps(updates)
+
         resp = self.client.patch(
             url, headers=headers, data=payload, cookies=self.cookies
         )
@@ -232,16 +271,18 @@ class NetBox:
         Returns:
             requests.Response: http response
         """
-        macList = self._cached_macList()
-        # print(f"\n\n{json.dumps(macList, indent=4)}\n\n")
         theMAC = mac.upper()
-        mac_found = list(filter(lambda x: x["mac_address"] == theMAC, macList))
+        with self.lock:
+            macList = self._cached_macList()
+            # print(f"\n\n{json.dumps(macList, indent=4)}\n\n")
+            mac_found = list(filter(lambda x: x["mac_address"] == theMAC, macList))
         # print(f"\nmac_found: {json.dumps(mac_found, indent=4)}\n")
         if len(mac_found) == 0:
             resp = self.create_mac_address(mac, interface_id)
             if resp.status_code == 201:
                 newMac = json.loads(resp.text)
-                self.macList.append(newMac)
+                with self.lock:
+                    self.macList.append(newMac)
                 # print(f"newMAC generated and appended: {json.dumps(self.macList, indent=4)}")
             return resp
         else:
@@ -319,7 +360,30 @@ class NetBox:
             self.cookies = resp.cookies
         return resp
 
+    def get_cached_ip_adresses(self) -> list[dict]:
+        """get IP-Adresslist from cache, read it from netbox if not cached yet
+
+        Returns:
+            list[dict]: copy of the cached IP addresses, None if Netbox didn't answer with OK
+        """
+        with self.lock:
+            ipAddrList = self._cached_ipAddrList()
+            return None if ipAddrList is None else list(ipAddrList)
+
 # ----------- some helpers ---------------------------
+    def _cached_ipAddrList(self) -> list[dict]:
+        """create cached list of IP addresses, if it doesn't exist; call it with lock held
+
+        Returns:
+            list[dict]: list of cached IP addresses, None if Netbox didn't answer with OK
+        """
+        if self.ipAddrList is None:
+            resp = self.get_ip_adresses()
+            if resp.status_code != 200:
+                return None
+            self.ipAddrList = json.loads(resp.text)["results"]
+        return self.ipAddrList
+
     def _cached_macList(self) -> list[dict]:
         """create cached list of MAC addresses, if it doesn' exist
 
@@ -349,26 +413,30 @@ class NetBox:
         """filter list of hosts with dns_name == name
 
         Args:
-            hosts (_type_): list of hosts
+            hosts (_type_): list of hosts, None for the cached v4 hosts
             name (_type_): name to be found
 
         Returns:
             list: list of hosts with matching name
         """
         the_name = name.casefold()
-        return list(filter(lambda x: x["dns_name"] == the_name, hosts))
+        with self.lock:
+            hosts = hosts if hosts is not None else self.get_v4_hosts(self._cached_ipAddrList())
+            return list(filter(lambda x: x["dns_name"] == the_name, hosts))
 
     def search_hosts_with_ip_address(self, hosts, ip) -> list:
         """filter list of hosts with ip-address == ip
 
         Args:
-            hosts (_type_): list of hosts
+            hosts (_type_): list of hosts, None for the cached v4 hosts
             ip (_type_): ip-address to be found
 
         Returns:
             list: list of hosts with matching ip-address
         """
-        return list(filter(lambda x: x["address"].split("/")[0] == ip, hosts))
+        with self.lock:
+            hosts = hosts if hosts is not None else self.get_v4_hosts(self._cached_ipAddrList())
+            return list(filter(lambda x: x["address"].split("/")[0] == ip, hosts))
 
     def has_interface(self, host: dict) -> bool:
         """check whether host has interface
@@ -392,6 +460,108 @@ class NetBox:
         Returns:
             list: list of MAC Addresses found
         """
-        macList = self._cached_macList()
         theMac = address.upper()
-        return list(filter(lambda x: x["mac_address"] == theMac, macList))
+        with self.lock:
+            macList = self._cached_macList()
+            return list(filter(lambda x: x["mac_address"] == theMac, macList))
+
+# ----------- webhook deltas -------------------------
+    def apply_webhook(self, payload: dict) -> bool:
+        """apply a Netbox webhook payload to the cached lists
+
+        Args:
+            payload (dict): webhook body sent by Netbox
+
+        Returns:
+            bool: true if the payload belongs to a handled object type
+        """
+        object_type = payload.get("object_type") or WEBHOOK_MODELS.get(
+            payload.get("model")
+        )
+        event = payload.get("event")
+        data = payload.get("data")
+        if event not in ["created", "updated", "deleted"] or not self.is_webhook_data(data):
+            return False
+        if object_type == "ipam.ipaddress":
+            self.apply_ip_address_event(event, data)
+        elif object_type == "dcim.macaddress":
+            self.apply_mac_address_event(event, data)
+        elif object_type == "dcim.interface":
+            self.apply_interface_event(event, data)
+        else:
+            return False
+        return True
+
+    def is_webhook_data(self, data) -> bool:
+        """check whether data of a webhook can be applied
+
+        Args:
+            data: "data" of the webhook body
+
+        Returns:
+            bool: true if data is an object with "id"
+        """
+        return isinstance(data, dict) and "id" in data
+
+    def apply_ip_address_event(self, event: str, data: dict) -> None:
+        """apply created/updated/deleted IP Address to cached list
+
+        Args:
+            event (str): "created", "updated" or "deleted"
+            data (dict): IP Address as sent by Netbox
+        """
+        with self.lock:
+            if self.ipAddrList is None:  # nothing cached yet, nothing to keep coherent
+                return
+            self.ipAddrList[:] = [x for x in self.ipAddrList if x["id"] != data["id"]]
+            if event != "deleted":
+                self.ipAddrList.append(data)
+
+    def apply_mac_address_event(self, event: str, data: dict) -> None:
+        """apply created/updated/deleted MAC Address to cached list
+
+        Args:
+            event (str): "created", "updated" or "deleted"
+            data (dict): MAC Address as sent by Netbox
+        """
+        with self.lock:
+            if self.macList is None:
+                return
+            self.macList[:] = [x for x in self.macList if x["id"] != data["id"]]
+            if event != "deleted":
+                # the cache holds brief entries (see get_mac_adresses)
+                self.macList.append(
+                    {k: data[k] for k in MAC_BRIEF_FIELDS if k in data}
+                )
+
+    def apply_interface_event(self, event: str, data: dict) -> None:
+        """apply changed/deleted interface to the IP Addresses assigned to it
+
+        Args:
+            event (str): "created", "updated" or "deleted"
+            data (dict): interface as sent by Netbox
+        """
+        with self.lock:
+            if self.ipAddrList is None or event == "created":
+                return
+            assigned = [x for x in self.ipAddrList if self._is_assigned_to(x, data["id"])]
+            for host in assigned:
+                if event == "deleted":
+                    # Netbox deletes the IP Addresses together with the interface
+                    self.ipAddrList.remove(host)
+                else:
+                    for key in ["name", "display", "description"]:
+                        if key in data:
+                            host["assigned_object"][key] = data[key]
+
+    def _is_assigned_to(self, host: dict, interface_id: int) -> bool:
+        """check whether host is assigned to interface with interface_id
+
+        Args:
+            host (dict): Netbox host
+            interface_id (int): ID of the interface
+
+        Returns:
+            bool: true if host is assigned to the interface
+        """
+        return bool(self.has_interface(host)) and host["assigned_object"]["id"] == interface_id
@@ -0,0 +1,121 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.netbox import NetBox
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_HOST = "WEBHOOK_HOST"
+WEBHOOK_PORT = "WEBHOOK_PORT"
+WEBHOOK_SECRET = "WEBHOOK_SECRET"
+WEBHOOK_ALLOW_UNSIGNED = "WEBHOOK_ALLOW_UNSIGNED"
+
+
+class WebhookReceiver:
+    """receive Netbox webhooks and apply them to the cached lists of a NetBox client"""
+
+    def __init__(
+        self, nb: NetBox, host: str = None, port: int = None, secret: str = None,
+        allow_unsigned: bool = None
+    ):
+        self.nb: NetBox = nb
+        self.host: str = host if host is not None else os.getenv(WEBHOOK_HOST, "127.0.0.1")
+        self.port: int = port if port is not None else int(os.getenv(WEBHOOK_PORT, "8088"))
+        self.secret: str = secret if secret is not None else os.getenv(WEBHOOK_SECRET)
+        # without secret everybody reaching the port could change the cached lists
+        self.allow_unsigned: bool = (
+            allow_unsigned if allow_unsigned is not None
+            else os.getenv(WEBHOOK_ALLOW_UNSIGNED, "").lower() in ["1", "true", "yes"]
+        )
+        self.server: ThreadingHTTPServer = None
+        self.thread: threading.Thread = None
+
+    def verify_signature(self, body: bytes, signature: str) -> bool:
+        """check X-Hook-Signature of Netbox (HMAC SHA512 of the body)
+
+        Args:
+            body (bytes): raw request body
+            signature (str): value of X-Hook-Signature header
+
+        Returns:
+            bool: true if the signature matches or unsigned webhooks are allowed
+        """
+        if not self.secret:
+            return self.allow_unsigned
+        if not signature:
+            return False
+        expected = hmac.new(self.secret.encode(), body, hashlib.sha512).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def handle(self, body: bytes, signature: str = None) -> int:
+        """handle one webhook request
+
+        Args:
+            body (bytes): raw request body
+            signature (str, optional): value of X-Hook-Signature header
+
+        Returns:
+            int: http status code to answer with
+        """
+        if not self.verify_signature(body, signature):
+            logger.error("webhook with invalid signature rejected")
+            return 403
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            logger.error("webhook with invalid json rejected")
+            return 400
+        if not isinstance(payload, dict) or not self.nb.is_webhook_data(payload.get("data")):
+            logger.error("webhook without object data rejected")
+            return 400
+        # apply_webhook takes the lock of nb, the sync reads the lists under the same lock
+        handled = self.nb.apply_webhook(payload)
+        if not handled:
+            logger.info(f"webhook {payload.get('event')} {payload.get('model')} ignored")
+        return 204
+
+    def start(self) -> None:
+        """start listening in a background thread
+
+        Raises:
+            ValueError: no secret configured and unsigned webhooks not allowed
+        """
+        if not self.secret and not self.allow_unsigned:
+            raise ValueError(
+                f"{WEBHOOK_SECRET} is not set, set {WEBHOOK_ALLOW_UNSIGNED}=true to accept unsigned webhooks"
+            )
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                body = self.rfile.read(length)
+                self.send_response(receiver.handle(body, self.headers.get("X-Hook-Signature")))
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """stop listening"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
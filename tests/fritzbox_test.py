@@ -2,8 +2,11 @@
 """
 
 from unittest import TestCase
-from src.fritzbox import FritzBox
+from unittest import mock
+from src.fritzbox import FritzBox, HostCollector, MAX_SESSIONS
 from dotenv import load_dotenv
+import os
+import threading
 
 load_dotenv()
 
@@ -21,3 +24,118 @@ class TestFritzBoxAccess(TestCase):
         hostnames = list(map(lambda x: x["name"], hosts))
         # print(hostnames)
         self.assertIn("fritz.box", hostnames, "Hostnames contains 'fritz.box'")
+
+
+class FakeHosts:
+    """simulated TR-064 session of a Fritz!Box"""
+
+    def __init__(self, entries: list, failures: dict = {}):
+        self.entries = entries
+        # index -> number of calls failing before the entry is returned
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    @property
+    def host_numbers(self) -> int:
+        return len(self.entries)
+
+    def get_generic_host_entry(self, index: int) -> dict:
+        with self.lock:
+            if self.failures.get(index, 0) > 0:
+                self.failures[index] -= 1
+                raise OSError("connection reset")
+        if index >= len(self.entries):
+            raise IndexError
+        return self.entries[index]
+
+
+class StaleCountHosts(FakeHosts):
+    """session reporting the number of hosts before some were added"""
+
+    def __init__(self, entries: list, count: int):
+        super().__init__(entries)
+        self.count = count
+
+    @property
+    def host_numbers(self) -> int:
+        return self.count
+
+
+def generic_entry(index: int) -> dict:
+    return {
+        "NewIPAddress": f"192.168.178.{index}",
+        "NewHostName": f"host{index}",
+        "NewMACAddress": f"00:00:00:00:00:{index:02X}",
+        "NewActive": index % 2 == 0,
+        "NewInterfaceType": "Ethernet",
+        "NewAddressSource": "DHCP",
+        "NewLeaseTimeRemaining": 0,
+    }
+
+
+class TestHostCollector(TestCase):
+    """TestClass for reading hosts over several sessions"""
+
+    def setUp(self) -> None:
+        self.entries = [generic_entry(i) for i in range(1, 24)]
+        self.opened = []
+        return super().setUp()
+
+    def new_session(self, failures: dict = {}) -> FakeHosts:
+        session = FakeHosts(self.entries, failures)
+        self.opened.append(session)
+        return session
+
+    def test_index_order(self):
+        """hosts are merged in index order"""
+        hosts = HostCollector(self.new_session, 4).get_hosts_info()
+        self.assertEqual([x["name"] for x in hosts], [f"host{i}" for i in range(1, 24)])
+        self.assertEqual(hosts[0]["status"], False)
+        self.assertEqual(len(self.opened), 4)
+
+    def test_uses_given_session(self):
+        """given session is the first one"""
+        fh = FakeHosts(self.entries)
+        hosts = HostCollector(self.new_session, 3).get_hosts_info(fh)
+        self.assertEqual(len(hosts), 23)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_sessions_limited(self):
+        """number of sessions is limited"""
+        self.assertEqual(HostCollector(self.new_session, 100).sessions, MAX_SESSIONS)
+        self.entries = self.entries[:2]
+        HostCollector(self.new_session, 4).get_hosts_info()
+        self.assertEqual(len(self.opened), 2)
+
+    def test_retry(self):
+        """failed entries are retried over a new session"""
+        failures = {5: 2}
+        hosts = HostCollector(lambda: self.new_session(failures), 2, retry_delay=0).get_hosts_info()
+        self.assertEqual(len(hosts), 23)
+        self.assertEqual(len(self.opened), 2 + 2)
+        failures[5] = 3
+        with self.assertRaises(OSError):
+            HostCollector(lambda: self.new_session(failures), 2, retry_delay=0).get_hosts_info()
+
+    def test_hosts_removed(self):
+        """hosts removed while reading end the list without gaps"""
+        fh = FakeHosts(list(self.entries))
+        del self.entries[10:]
+        hosts = HostCollector(self.new_session, 4).get_hosts_info(fh)
+        self.assertEqual(len(hosts), 10)
+
+    def test_hosts_added(self):
+        """hosts added after reading the number of hosts are read, too"""
+        fh = StaleCountHosts(self.entries, 20)
+        hosts = HostCollector(self.new_session, 4).get_hosts_info(fh)
+        self.assertEqual([x["name"] for x in hosts], [f"host{i}" for i in range(1, 24)])
+
+    def test_invalid_sessions(self):
+        """invalid SESSIONS falls back to one session"""
+        fb = FritzBox.__new__(FritzBox)
+        fb.fh = mock.Mock()
+        fb.fh.get_hosts_info.return_value = []
+        with mock.patch.dict(os.environ, {"SESSIONS": "four"}):
+            with self.assertLogs("src.fritzbox", "WARNING"):
+                self.assertEqual(fb.get_hosts(), [])
+        fb.fh.get_hosts_info.assert_called_once()
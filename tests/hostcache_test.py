@@ -0,0 +1,136 @@
+"""Modul hostcache test
+"""
+
+from unittest import TestCase
+from src.hostcache import HostCache, HostCacheError, HEADER
+from pathlib import Path
+import json
+import tempfile
+
+
+HOSTS = [
+    {
+        "ip": "192.168.178.1",
+        "name": "fritz.box",
+        "mac": "3C:A6:2F:00:00:01",
+        "status": True,
+        "interface_type": "Ethernet",
+        "address_source": "Static",
+        "lease_time_remaining": 0,
+    },
+    {
+        "ip": "",
+        "name": "Küchenradio",
+        "mac": None,
+        "status": False,
+        "interface_type": "802.11",
+        "address_source": "DHCP",
+        "lease_time_remaining": 86400,
+    },
+    {
+        "ip": "fd00::1",
+        "name": "nas",
+        "mac": "00:11:32:00:00:02",
+        "status": True,
+        "interface_type": "Ethernet",
+        "address_source": "DHCP",
+        "lease_time_remaining": None,
+    },
+]
+
+
+class TestHostCache(TestCase):
+    """TestClass for the binary host cache"""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hosts.cache"
+        self.cache = HostCache(str(self.path))
+        self.cache.save(HOSTS)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        return super().tearDown()
+
+    def test_round_trip(self):
+        """hosts are read as written"""
+        self.assertEqual(self.cache.load(), HOSTS)
+
+    def test_columns(self):
+        """only requested columns are returned"""
+        hosts = self.cache.load(["name", "status", "unknown"])
+        self.assertEqual(hosts[1], {"name": "Küchenradio", "status": False})
+
+    def test_where(self):
+        """filters are applied while decoding"""
+        hosts = self.cache.load(
+            ["ip", "name"],
+            {"status": bool, "ip": lambda ip: len(ip.split(".")) == 4},
+        )
+        self.assertEqual(hosts, [{"ip": "192.168.178.1", "name": "fritz.box"}])
+        self.assertEqual(self.cache.load([], {"status": bool}), [{}, {}])
+
+    def test_empty(self):
+        """empty list of hosts"""
+        self.cache.save([])
+        self.assertEqual(self.cache.load(), [])
+
+    def test_missing(self):
+        """missing file raises HostCacheError"""
+        with self.assertRaises(HostCacheError):
+            HostCache(str(self.path) + ".missing").load()
+
+    def test_damaged_column(self):
+        """damaged column is detected when it is read"""
+        data = bytearray(self.path.read_bytes())
+        data[-1] ^= 0xFF  # last byte belongs to column lease_time_remaining
+        self.path.write_bytes(bytes(data))
+        self.assertEqual(len(self.cache.load(["name"])), 3)
+        with self.assertRaises(HostCacheError):
+            self.cache.load()
+
+    def test_damaged_header(self):
+        """damaged index and other versions are rejected"""
+        data = bytearray(self.path.read_bytes())
+        data[HEADER.size + 3] ^= 0xFF
+        self.path.write_bytes(bytes(data))
+        with self.assertRaises(HostCacheError):
+            self.cache.load()
+        data[HEADER.size + 3] ^= 0xFF
+        data[4] = 99
+        self.path.write_bytes(bytes(data))
+        with self.assertRaisesRegex(HostCacheError, "version"):
+            self.cache.load()
+        self.path.write_bytes(bytes(data[:5]))
+        with self.assertRaises(HostCacheError):
+            self.cache.load()
+
+    def test_export_json(self):
+        """json export for humans"""
+        path = Path(self.tmp.name) / "hosts.json"
+        self.cache.export_json(str(path))
+        self.assertEqual(json.loads(path.read_text(encoding="utf-8")), HOSTS)
+
+    def test_predicate_errors_pass_through(self):
+        """errors of the predicates are no cache errors"""
+        def broken(ip):
+            raise ValueError("bug in predicate")
+
+        with self.assertRaisesRegex(ValueError, "bug in predicate") as cm:
+            self.cache.load(["ip"], {"ip": broken})
+        self.assertNotIsInstance(cm.exception, HostCacheError)
+
+    def test_empty_file(self):
+        """empty file raises HostCacheError"""
+        self.path.write_bytes(b"")
+        with self.assertRaises(HostCacheError):
+            self.cache.load()
+
+    def test_json_fallback(self):
+        """big numbers and bool mixed with int keep their values and types"""
+        hosts = [{"big": 2 ** 70, "mixed": True}, {"big": -1, "mixed": 2}, {"big": None, "mixed": None}]
+        self.cache.save(hosts)
+        loaded = self.cache.load()
+        self.assertEqual(loaded, hosts)
+        self.assertIs(loaded[0]["mixed"], True)
@@ -0,0 +1,140 @@
+"""Modul hostfilter test
+"""
+
+from unittest import TestCase, mock
+from src.hostfilter import HostFilter
+from src.fritzbox import FritzBox
+
+
+def host(ip: str, name: str = "host", mac: str = "00:11:22:33:44:55", status: bool = True) -> dict:
+    return {"ip": ip, "name": name, "mac": mac, "status": status}
+
+
+class TestHostFilter(TestCase):
+    """TestClass for compiled ignore/accept lists"""
+
+    def test_no_substring_match(self):
+        """192.168.178.2 doesn't match 192.168.178.20"""
+        f = HostFilter.from_string("[192.168.178.20, 192.168.178.140]")
+        self.assertFalse(f.match_ip("192.168.178.2"))
+        self.assertFalse(f.match_ip("192.168.178.14"))
+        self.assertTrue(f.match_ip("192.168.178.20"))
+
+    def test_cidr_and_range(self):
+        """networks and ranges are matched including their bounds"""
+        f = HostFilter.from_string("192.168.178.16/30 192.168.178.100-192.168.178.102, 10.0.0.5-10.0.0.1")
+        for ip in ["192.168.178.16", "192.168.178.19", "192.168.178.100", "192.168.178.102", "10.0.0.3"]:
+            self.assertTrue(f.match_ip(ip), ip)
+        for ip in ["192.168.178.15", "192.168.178.20", "192.168.178.99", "192.168.178.103", "10.0.0.6"]:
+            self.assertFalse(f.match_ip(ip), ip)
+
+    def test_overlapping_ranges(self):
+        """overlapping and adjacent ranges are merged"""
+        f = HostFilter(["10.0.0.0/24", "10.0.0.128/25", "10.0.1.0-10.0.1.10", "10.0.0.200-10.0.1.5"])
+        self.assertEqual(f.starts[4], [int(0x0A000000)])
+        self.assertEqual(f.ends[4], [int(0x0A00010A)])
+        self.assertTrue(f.match_ip("10.0.1.10"))
+        self.assertFalse(f.match_ip("10.0.1.11"))
+
+    def test_ipv6(self):
+        """IPv6 addresses and networks don't mix with IPv4"""
+        f = HostFilter(["fd00::/64", "fe80::1"])
+        self.assertTrue(f.match_ip("fd00::abcd"))
+        self.assertTrue(f.match_ip("fe80::1"))
+        self.assertFalse(f.match_ip("0.0.0.1"))
+        self.assertFalse(f.match_ip(""))
+        self.assertFalse(f.match_ip("no ip"))
+
+    def test_ip_without_parsing(self):
+        """without ranges IPv4 addresses are matched by their strings"""
+        f = HostFilter(["192.168.178.20", "fd00::1"])
+        with mock.patch("src.hostfilter.ip_address", side_effect=AssertionError("parsed")):
+            self.assertTrue(f.match_ip("192.168.178.20"))
+            self.assertFalse(f.match_ip("192.168.178.2"))
+            self.assertTrue(f.match_ip("fd00::1"))
+        # IPv6 and hosts with ranges in the filter are still parsed
+        self.assertTrue(f.match_ip("FD00:0::1"))
+        f = HostFilter(["192.168.178.20", "10.0.0.0/8"])
+        self.assertTrue(f.has_ranges)
+        self.assertTrue(f.match_ip("10.1.2.3"))
+        self.assertFalse(f.match_ip("192.168.178.2"))
+
+    def test_ipv4_glob(self):
+        """IPv4 addresses with glob pattern are no hostnames"""
+        f = HostFilter.from_string("[192.168.178.*, 10.0.0.1?, 172.16.[1-3].1]")
+        self.assertEqual(f.names, set())
+        for ip in ["192.168.178.1", "192.168.178.254", "10.0.0.12", "172.16.2.1"]:
+            self.assertTrue(f.match_ip(ip), ip)
+        for ip in ["192.168.179.1", "10.0.0.1", "10.0.0.123", "172.16.4.1", "fd00::1"]:
+            self.assertFalse(f.match_ip(ip), ip)
+        self.assertFalse(f.matches(host("", name="192.168.178.1")))
+
+    def test_parse_only_for_ranges_of_version(self):
+        """addresses are parsed only if the filter has ranges of their version"""
+        f = HostFilter(["fd00::/64", "192.168.178.20"])
+        with mock.patch("src.hostfilter.ip_address", side_effect=AssertionError("parsed")):
+            self.assertFalse(f.match_ip("192.168.178.2"))
+        self.assertTrue(f.match_ip("fd00::1"))
+        f = HostFilter(["10.0.0.0/8"])
+        with mock.patch("src.hostfilter.ip_address", side_effect=AssertionError("parsed")):
+            self.assertFalse(f.match_ip("fd00::1"))
+
+    def test_matches_skips_empty_lists(self):
+        """MAC addresses and hostnames are only checked if the filter has some"""
+        f = HostFilter(["192.168.178.20"])
+        self.assertFalse(f.has_macs or f.has_names)
+        with mock.patch.object(f, "match_mac", side_effect=AssertionError("mac")), \
+                mock.patch.object(f, "match_name", side_effect=AssertionError("name")):
+            self.assertFalse(f.matches(host("192.168.178.2")))
+            self.assertTrue(f.matches(host("192.168.178.20")))
+        f = HostFilter(["printer"])
+        self.assertTrue(f.has_names and not f.has_macs)
+        self.assertTrue(f.matches(host("192.168.178.2", "Printer")))
+
+    def test_mac(self):
+        """MAC addresses with glob patterns, case insensitive"""
+        f = HostFilter(["00:80:41:ae:fd:7e", "DC:A6:32:*", "mac:b8-27-eb-*"])
+        self.assertTrue(f.match_mac("00:80:41:AE:FD:7E"))
+        self.assertTrue(f.match_mac("dc:a6:32:01:02:03"))
+        self.assertTrue(f.match_mac("B8:27:EB:01:02:03"))
+        self.assertFalse(f.match_mac("00:80:41:AE:FD:7F"))
+        self.assertFalse(f.match_name("DC:A6:32:01:02:03"))
+
+    def test_dashed_mac(self):
+        """MAC addresses with "-" are recognized without prefix"""
+        f = HostFilter.from_string("[b8-27-eb-*, 00-80-41-ae-fd-7e, ab-cd, name:de-ad-be-ef]")
+        self.assertTrue(f.match_mac("B8:27:EB:01:02:03"))
+        self.assertTrue(f.match_mac("00:80:41:AE:FD:7E"))
+        self.assertTrue(f.match_name("ab-cd"))
+        self.assertTrue(f.match_name("de-ad-be-ef"))
+        self.assertFalse(f.match_mac("DE:AD:BE:EF:00:00"))
+
+    def test_name(self):
+        """hostnames with glob patterns, case insensitive"""
+        f = HostFilter(["Printer", "android-*", "name:fade"])
+        self.assertTrue(f.match_name("printer"))
+        self.assertTrue(f.match_name("Android-1234"))
+        self.assertTrue(f.match_name("fade"))
+        self.assertFalse(f.match_name("printer2"))
+        self.assertFalse(f.match_ip("192.168.178.2"))
+
+    def test_empty(self):
+        """empty environment gives empty filter"""
+        for text in [None, "", "[]"]:
+            self.assertFalse(HostFilter.from_string(text).matches(host("192.168.178.2")))
+
+    def test_get_active_hosts(self):
+        """ignore and accept lists in get_active_hosts"""
+        hosts = [
+            host("192.168.178.2"),
+            host("192.168.178.20"),
+            host("192.168.178.21", status=False),
+            host("192.168.178.30", "tv", "AA:BB:CC:00:00:01"),
+            host("", status=False),
+        ]
+        ignore = HostFilter.from_string("[192.168.178.20, aa:bb:cc:*]")
+        accept = HostFilter.from_string("[192.168.178.21]")
+        active = FritzBox.get_active_hosts(None, hosts, ignore, accept)
+        self.assertEqual([x["ip"] for x in active], ["192.168.178.2", "192.168.178.21"])
+        active = FritzBox.get_active_hosts(None, hosts, ["192.168.178.20"])
+        self.assertEqual([x["ip"] for x in active], ["192.168.178.2", "192.168.178.30"])
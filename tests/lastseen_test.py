@@ -0,0 +1,139 @@
+"""Modul lastseen test
+"""
+
+from unittest import TestCase
+from src.lastseen import LastSeen
+from datetime import datetime, timedelta, timezone
+import json
+
+NOW = datetime(2025, 3, 2, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = ""
+
+
+class FakeNetBox:
+    """records bulk PATCH requests instead of sending them"""
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        # status codes of the next requests, then status_code
+        self.status_codes = []
+        self.requests = []
+
+    def bulk_modify_ip_addresses(self, updates: list[dict]) -> FakeResponse:
+        self.requests.append(json.loads(json.dumps(updates)))
+        if len(self.status_codes) > 0:
+            return FakeResponse(self.status_codes.pop(0))
+        return FakeResponse(self.status_code)
+
+
+def nb_host(id: int, ip: str, active=None, last_seen=None) -> dict:
+    fields = {}
+    if active is not None:
+        fields = {"fritzbox_active": active, "last_seen": last_seen}
+    return {"id": id, "address": f"{ip}/24", "custom_fields": fields}
+
+
+class TestLastSeen(TestCase):
+    """TestClass for coalesced last seen updates"""
+
+    def setUp(self) -> None:
+        self.nb = FakeNetBox()
+        self.nb_hosts = [
+            nb_host(1, "192.168.178.2"),
+            nb_host(2, "192.168.178.3", True, (NOW - timedelta(minutes=10)).isoformat()),
+            nb_host(3, "192.168.178.4", True, (NOW - timedelta(hours=2)).isoformat()),
+            nb_host(4, "192.168.178.5", False, (NOW - timedelta(days=3)).isoformat()),
+            nb_host(5, "192.168.178.6", True, (NOW - timedelta(minutes=5)).isoformat()),
+        ]
+        self.ls = LastSeen(self.nb, self.nb_hosts, interval=3600, batch_size=2)
+        return super().setUp()
+
+    def test_only_changes_queued(self):
+        """unchanged and fresh hosts are not written"""
+        self.assertTrue(self.ls.record({"ip": "192.168.178.2", "status": True}, NOW))  # unknown
+        self.assertFalse(self.ls.record({"ip": "192.168.178.3", "status": True}, NOW))  # fresh
+        self.assertTrue(self.ls.record({"ip": "192.168.178.4", "status": True}, NOW))  # stale
+        self.assertFalse(self.ls.record({"ip": "192.168.178.5", "status": False}, NOW))  # still gone
+        self.assertTrue(self.ls.record({"ip": "192.168.178.6", "status": False}, NOW))  # gone
+        self.assertFalse(self.ls.record({"ip": "192.168.178.99", "status": True}, NOW))  # not in Netbox
+        self.assertEqual([x["id"] for x in self.ls.updates], [1, 3, 5])
+        self.assertEqual(
+            self.ls.updates[2]["custom_fields"], {"fritzbox_active": False}
+        )
+        self.assertEqual(
+            self.ls.updates[0]["custom_fields"],
+            {"fritzbox_active": True, "last_seen": "2025-03-02T12:00:00+00:00"},
+        )
+
+    def test_coalesced_within_run(self):
+        """same host twice gives one update"""
+        self.ls.record({"ip": "192.168.178.2", "status": True}, NOW)
+        self.ls.record({"ip": "192.168.178.2", "status": True}, NOW + timedelta(minutes=1))
+        self.assertEqual(len(self.ls.updates), 1)
+
+    def test_older_observation_ignored(self):
+        """cached observation older than last seen doesn't overwrite it"""
+        self.assertFalse(self.ls.record({"ip": "192.168.178.6", "status": False}, NOW - timedelta(hours=1)))
+
+    def test_flush_in_batches(self):
+        """updates are sent as bulk PATCH in batches"""
+        for host in self.nb_hosts:
+            self.ls.record({"ip": host["address"].split("/")[0], "status": False}, NOW)
+        self.assertEqual(self.ls.flush(), 4)
+        self.assertEqual([len(x) for x in self.nb.requests], [2, 2])
+        self.assertEqual(self.ls.updates, [])
+        self.assertEqual(self.ls.flush(), 0)
+        self.assertEqual(len(self.nb.requests), 2)
+
+    def test_flush_failure(self):
+        """failed batch stays queued"""
+        self.nb.status_code = 400
+        self.ls.record({"ip": "192.168.178.2", "status": True}, NOW)
+        self.assertEqual(self.ls.flush(), 0)
+        self.assertEqual(len(self.ls.updates), 1)
+
+    def test_flush_goes_on_after_failure(self):
+        """a failed batch doesn't hold back the following batches"""
+        self.nb.status_codes = [400, 200]
+        for host in self.nb_hosts:
+            self.ls.record({"ip": host["address"].split("/")[0], "status": False}, NOW)
+        with self.assertLogs("src.lastseen", "ERROR") as logs:
+            self.assertEqual(self.ls.flush(), 2)
+        self.assertIn("2 of 4 last seen updates not written", logs.output[-1])
+        self.assertEqual([x["id"] for x in self.ls.updates], [1, 2])
+
+    def test_same_address_several_times(self):
+        """all IP Addresses with the same address are updated"""
+        self.nb_hosts.append({"id": 6, "address": "192.168.178.3/32", "custom_fields": None})
+        ls = LastSeen(self.nb, self.nb_hosts, interval=3600)
+        self.assertTrue(ls.record({"ip": "192.168.178.3", "status": True}, NOW))
+        self.assertEqual([x["id"] for x in ls.updates], [6])
+
+    def test_netbox_hosts_changed_after_write(self):
+        """cached Netbox hosts change only when the update was written"""
+        self.nb.status_codes = [400]
+        self.assertTrue(self.ls.record({"ip": "192.168.178.4", "status": True}, NOW))
+        self.assertFalse(self.ls.record({"ip": "192.168.178.4", "status": True}, NOW))  # queued
+        self.assertEqual(len(self.ls.updates), 1)
+        stale = (NOW - timedelta(hours=2)).isoformat()
+        self.assertEqual(self.nb_hosts[2]["custom_fields"]["last_seen"], stale)
+        self.ls.flush()
+        self.assertEqual(self.nb_hosts[2]["custom_fields"]["last_seen"], stale)
+        self.assertEqual(self.ls.flush(), 1)
+        self.assertEqual(self.nb_hosts[2]["custom_fields"]["last_seen"], NOW.isoformat())
+        self.assertEqual(self.ls.pending, {})
+
+    def test_coalesced_state_change(self):
+        """a queued update takes the later active state"""
+        self.ls.record({"ip": "192.168.178.2", "status": True}, NOW)
+        self.ls.record({"ip": "192.168.178.2", "status": False}, NOW + timedelta(minutes=1))
+        self.assertEqual(
+            self.ls.updates,
+            [{"id": 1, "custom_fields": {"fritzbox_active": False, "last_seen": NOW.isoformat()}}],
+        )
+        self.assertEqual(self.nb_hosts[0]["custom_fields"], {})
@@ -0,0 +1,238 @@
+"""Modul webhook test
+"""
+
+from unittest import TestCase, mock
+from src.netbox import NetBox
+from src.webhook import WebhookReceiver
+from pathlib import Path
+import hashlib
+import hmac
+import json
+import os
+import http.client
+import threading
+import urllib.request
+
+
+DATA = Path(__file__).parent / "data"
+ENV = {"TOKEN": "token", "PROTOCOL": "http", "NETBOX": "localhost", "PORT": "5580"}
+
+
+def recorded(name: str) -> bytes:
+    """read recorded webhook payload
+
+    Args:
+        name (str): name of the recording without extension
+
+    Returns:
+        bytes: raw webhook body
+    """
+    return (DATA / f"webhook_{name}.json").read_bytes()
+
+
+class TestWebhookReceiver(TestCase):
+    """TestClass for applying recorded Netbox webhooks"""
+
+    def setUp(self) -> None:
+        with mock.patch.dict(os.environ, ENV):
+            self.nb = NetBox()
+        self.nb.ipAddrList = [
+            {
+                "id": 12,
+                "address": "192.168.178.24/24",
+                "dns_name": "nas",
+                "family": {"value": 4},
+                "assigned_object_type": "dcim.interface",
+                "assigned_object": {"id": 7, "display": "eth0", "name": "eth0"},
+            },
+            {
+                "id": 13,
+                "address": "192.168.178.30/24",
+                "dns_name": "printer",
+                "family": {"value": 4},
+                "assigned_object_type": None,
+                "assigned_object": None,
+            },
+        ]
+        self.nb.macList = [
+            {"id": 40, "display": "00:11:22:33:44:55", "mac_address": "00:11:22:33:44:55"}
+        ]
+        self.receiver = WebhookReceiver(self.nb, "127.0.0.1", 0, "", allow_unsigned=True)
+        return super().setUp()
+
+    def test_ip_address_updated(self):
+        """updated IP Address replaces the cached one"""
+        self.assertEqual(self.receiver.handle(recorded("ipaddress_updated")), 204)
+        found = self.nb.search_hosts_with_dns_name(self.nb.ipAddrList, "nas")
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]["address"], "192.168.178.25/24")
+
+    def test_ip_address_deleted(self):
+        """deleted IP Address is removed from cache"""
+        self.receiver.handle(recorded("ipaddress_deleted"))
+        self.assertEqual(self.nb.search_hosts_with_ip_address(self.nb.ipAddrList, "192.168.178.30"), [])
+        self.assertEqual(len(self.nb.ipAddrList), 1)
+
+    def test_mac_address_created(self):
+        """created MAC Address is appended as brief entry"""
+        self.receiver.handle(recorded("macaddress_created"))
+        found = self.nb.search_macList_with_address("00:80:41:ae:fd:7e")
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]["id"], 41)
+        self.assertNotIn("assigned_object_id", found[0])
+
+    def test_interface_updated(self):
+        """renamed interface is reflected in assigned IP Addresses"""
+        self.receiver.handle(recorded("interface_updated"))
+        self.assertEqual(self.nb.ipAddrList[0]["assigned_object"]["name"], "lan0")
+
+    def test_interface_deleted(self):
+        """IP Addresses of a deleted interface are removed"""
+        self.receiver.handle(recorded("interface_deleted"))
+        self.assertEqual([x["id"] for x in self.nb.ipAddrList], [13])
+
+    def test_unknown_model_ignored(self):
+        """webhooks of other models don't touch the cache"""
+        body = json.dumps({"event": "updated", "model": "device", "data": {"id": 12}}).encode()
+        self.assertEqual(self.receiver.handle(body), 204)
+        self.assertEqual(len(self.nb.ipAddrList), 2)
+
+    def test_invalid_json(self):
+        """invalid body is rejected"""
+        self.assertEqual(self.receiver.handle(b"not json"), 400)
+
+    def test_invalid_data(self):
+        """webhooks without object with id are rejected"""
+        for data in [None, [], "x", {"address": "192.168.178.99/24"}]:
+            body = json.dumps({"event": "created", "model": "ipaddress", "data": data}).encode()
+            self.assertEqual(self.receiver.handle(body), 400, data)
+        self.assertEqual(len(self.nb.ipAddrList), 2)
+        self.assertFalse(self.nb.apply_webhook({"event": "created", "model": "ipaddress", "data": {}}))
+
+    def test_concurrent_writes(self):
+        """webhooks and own writes don't lose entries"""
+        def created(first: int):
+            for id in range(first, first + 500):
+                self.nb.apply_ip_address_event(
+                    "created", {"id": id, "address": "10.0.0.1/24", "dns_name": "x", "family": {"value": 4}}
+                )
+
+        threads = [threading.Thread(target=created, args=(1000 * i,)) for i in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.nb.ipAddrList), 2 + 4 * 500)
+
+    def test_shares_lock(self):
+        """receiver applies webhooks under the lock of the NetBox client"""
+        applied = threading.Event()
+
+        def handle():
+            self.receiver.handle(recorded("ipaddress_deleted"))
+            applied.set()
+
+        with self.nb.lock:
+            thread = threading.Thread(target=handle)
+            thread.start()
+            self.assertFalse(applied.wait(0.2))
+        thread.join()
+        self.assertEqual(len(self.nb.ipAddrList), 1)
+
+    def test_signature(self):
+        """with secret only signed webhooks are accepted"""
+        self.receiver.secret = "secret"
+        body = recorded("ipaddress_deleted")
+        self.assertEqual(self.receiver.handle(body, "wrong"), 403)
+        self.assertEqual(len(self.nb.ipAddrList), 2)
+        signature = hmac.new(b"secret", body, hashlib.sha512).hexdigest()
+        self.assertEqual(self.receiver.handle(body, signature), 204)
+        self.assertEqual(len(self.nb.ipAddrList), 1)
+
+    def test_http_post(self):
+        """webhook is received via http"""
+        self.receiver.start()
+        try:
+            req = urllib.request.Request(
+                f"http://127.0.0.1:{self.receiver.port}/",
+                data=recorded("ipaddress_deleted"),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(req) as resp:
+                self.assertEqual(resp.status, 204)
+        finally:
+            self.receiver.stop()
+        self.assertEqual(len(self.nb.ipAddrList), 1)
+
+    def test_unsigned_refused(self):
+        """without secret unsigned webhooks must be allowed explicitly"""
+        receiver = WebhookReceiver(self.nb, "127.0.0.1", 0, "", allow_unsigned=False)
+        self.assertEqual(receiver.handle(recorded("ipaddress_deleted")), 403)
+        with self.assertRaises(ValueError):
+            receiver.start()
+        self.assertEqual(len(self.nb.ipAddrList), 2)
+
+    def test_default_host(self):
+        """receiver listens only local by default"""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(WebhookReceiver(self.nb).host, "127.0.0.1")
+
+    def test_invalid_content_length(self):
+        """invalid Content-Length is answered with 400"""
+        self.receiver.start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", self.receiver.port)
+            conn.putrequest("POST", "/")
+            conn.putheader("Content-Length", "abc")
+            conn.endheaders()
+            self.assertEqual(conn.getresponse().status, 400)
+            conn.close()
+        finally:
+            self.receiver.stop()
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data=None):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.cookies = None
+
+
+class TestCachedIpAddrList(TestCase):
+    """TestClass for the cached IP-Addresses read by the sync"""
+
+    def setUp(self) -> None:
+        with mock.patch.dict(os.environ, ENV):
+            self.nb = NetBox()
+        self.nb.client = mock.Mock()
+        self.nb.client.get.return_value = FakeResponse(
+            200,
+            {"results": [
+                {"id": 12, "address": "192.168.178.24/24", "dns_name": "nas", "family": {"value": 4}},
+                {"id": 14, "address": "fd00::24/64", "dns_name": "nas", "family": {"value": 6}},
+            ]},
+        )
+        return super().setUp()
+
+    def test_not_ok(self):
+        """no list if Netbox doesn't answer with OK"""
+        self.nb.client.get.return_value = FakeResponse(500)
+        self.assertIsNone(self.nb.get_cached_ip_adresses())
+        self.assertIsNone(self.nb.ipAddrList)
+
+    def test_search_uses_cache(self):
+        """searches without hosts use the cached v4 hosts updated by webhooks"""
+        self.assertEqual([x["id"] for x in self.nb.search_hosts_with_dns_name(None, "nas")], [12])
+        self.nb.apply_webhook(json.loads(recorded("ipaddress_updated")))
+        self.assertEqual(self.nb.search_hosts_with_ip_address(None, "192.168.178.24"), [])
+        self.assertEqual(len(self.nb.search_hosts_with_ip_address(None, "192.168.178.25")), 1)
+        self.assertEqual(self.nb.client.get.call_count, 1)
+
+    def test_own_writes_update_cache(self):
+        """created IP Address is in the cache"""
+        self.nb.get_cached_ip_adresses()
+        self.nb.client.post.return_value = FakeResponse(
+            201, {"id": 15, "address": "192.168.178.40/24", "dns_name": "tv", "family": {"value": 4}}
+        )
+        self.nb.create_ip_address("192.168.178.40", "tv")
+        self.assertEqual(len(self.nb.search_hosts_with_dns_name(None, "tv")), 1)